@@ -6,14 +6,53 @@ Performance Benchmark Script
 Measures FPS, memory, and CPU usage for original vs optimized code.
 """
 
+import json
+import mmap
+import re
+import tempfile
 import time
 import psutil
 import subprocess
 import sys
 import os
-from typing import Dict, Any, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
+_FPS_RE_BYTES = re.compile(rb'FPS[:\s]+([\d.]+)')
+
+
+class _Sampler(threading.Thread):
+    """Background CPU/memory sampler for a running subprocess."""
+
+    def __init__(self, pid: int, interval: float = 1.0):
+        """Initialize sampler for the given process id."""
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.cpu_samples: List[float] = []
+        self.mem_samples: List[float] = []
+        self._stop_event = threading.Event()
+        self.proc = psutil.Process(pid)
+        # Prime cpu_percent so the first blocking call returns a real value
+        self.proc.cpu_percent(None)
+
+    def run(self):
+        """Sample until stopped or the process exits."""
+        while not self._stop_event.is_set():
+            try:
+                cpu_pct = self.proc.cpu_percent(interval=self.interval)
+                memory_mb = self.proc.memory_info().rss / 1024 / 1024
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                break
+            self.cpu_samples.append(cpu_pct)
+            self.mem_samples.append(memory_mb)
+
+    def stop(self):
+        """Signal the sampler to stop and wait for it."""
+        self._stop_event.set()
+        self.join()
+
 
 class PerformanceBenchmark:
     """Benchmark performance of code."""
@@ -22,58 +61,68 @@ class PerformanceBenchmark:
         """Initialize benchmark."""
         self.results_dir = Path("benchmark_results")
         self.results_dir.mkdir(exist_ok=True)
+        # Reuse the psutil handle for this process instead of rebuilding it
+        self._self_proc = psutil.Process()
         
     def measure_execution(
         self, 
         command: list, 
-        label: str
+        label: str,
+        min_sample_interval: float = 1.0,
+        affinity: Optional[List[int]] = None
     ) -> Dict[str, Any]:
-        """Measure execution time, FPS, memory."""
+        """Measure execution time, FPS, memory.
+        
+        CPU/memory are sampled at most once per ``min_sample_interval``
+        seconds, since psutil's cpu_percent() is unreliable below ~0.1s.
+        If ``affinity`` is given, the subject is pinned to those CPUs.
+        """
         print(f"\n📊 Measuring {label}...")
         
         start_time = time.time()
         start_memory = self._get_memory_usage()
         
-        # Start process
+        # Stream output to a temp file rather than a pipe: a full 64 KiB
+        # pipe would stall the subject and inflate harness memory
+        output_file = tempfile.TemporaryFile()
         process = subprocess.Popen(
             command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            stdout=output_file,
+            stderr=subprocess.STDOUT
         )
         
-        # Monitor while running
-        cpu_samples = []
-        memory_samples = []
+        if affinity:
+            try:
+                psutil.Process(process.pid).cpu_affinity(affinity)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, AttributeError):
+                pass
         
+        # Sample CPU and memory in the background while we block on the process
         max_duration = 60  # Max 60 seconds
+        try:
+            sampler = _Sampler(process.pid, interval=min_sample_interval)
+            sampler.start()
+        except psutil.NoSuchProcess:
+            sampler = None
         
         try:
-            elapsed = 0
-            while process.poll() is None and elapsed < max_duration:
-                time.sleep(0.1)
-                elapsed = time.time() - start_time
-                
-                # Sample CPU and memory
-                try:
-                    cpu_pct = process.cpu_percent()
-                    memory_mb = self._get_process_memory(process.pid)
-                    if memory_mb > 0:
-                        cpu_samples.append(cpu_pct)
-                        memory_samples.append(memory_mb)
-                except:
-                    pass
-                    
-            # Wait for completion
-            stdout, stderr = process.communicate(timeout=30)
+            process.wait(timeout=max_duration)
             
             end_time = time.time()
             duration = end_time - start_time
             
         except subprocess.TimeoutExpired:
             process.kill()
-            stdout, stderr = process.communicate()
+            process.wait()
             duration = max_duration
+        
+        if sampler is not None:
+            sampler.stop()
+            cpu_samples = sampler.cpu_samples
+            memory_samples = sampler.mem_samples
+        else:
+            cpu_samples = []
+            memory_samples = []
             
         end_memory = self._get_memory_usage()
         
@@ -83,7 +132,8 @@ class PerformanceBenchmark:
         peak_memory = max(memory_samples) if memory_samples else 0
         
         # Try to extract FPS from output
-        fps = self._extract_fps(stdout)
+        with output_file:
+            fps = self._extract_fps_from_file(output_file)
         
         result = {
             'label': label,
@@ -99,28 +149,42 @@ class PerformanceBenchmark:
     
     def _get_memory_usage(self) -> float:
         """Get current memory usage in MB."""
-        process = psutil.Process()
-        return process.memory_info().rss / 1024 / 1024
+        return self._self_proc.memory_info().rss / 1024 / 1024
     
-    def _get_process_memory(self, pid: int) -> float:
-        """Get memory usage for specific process."""
-        try:
-            process = psutil.Process(pid)
-            return process.memory_info().rss / 1024 / 1024
-        except:
-            return 0
+    def _extract_fps_from_file(self, output_file) -> float:
+        """Extract FPS from a captured output file without decoding it."""
+        output_file.flush()
+        if os.fstat(output_file.fileno()).st_size == 0:
+            return 0.0
+        with mmap.mmap(output_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            match = _FPS_RE_BYTES.search(data)
+            return float(match.group(1)) if match else 0.0
     
-    def _extract_fps(self, output: str) -> float:
-        """Extract FPS from output."""
-        # Look for FPS in output
-        import re
-        match = re.search(r'FPS[:\s]+([\d.]+)', output)
-        if match:
-            return float(match.group(1))
-        return 0.0
+    def _split_affinity(self) -> Optional[Tuple[List[int], List[int]]]:
+        """Split available CPUs into two disjoint sets, or None if too few."""
+        if not hasattr(os, "sched_getaffinity"):
+            return None
+        cpus = sorted(os.sched_getaffinity(0))
+        if len(cpus) < 4:
+            return None
+        half = len(cpus) // 2
+        return cpus[:half], cpus[half:]
     
-    def benchmark(self, video_path: str) -> Tuple[Dict, Dict]:
-        """Run full benchmark."""
+    def benchmark(
+        self,
+        video_path: str,
+        optimized_script: Optional[str] = None,
+        parallel: bool = False
+    ) -> Tuple[Dict, Dict]:
+        """Run full benchmark.
+        
+        Args:
+            video_path: Input video for both runs
+            optimized_script: Script to benchmark against people_counter.py
+                (a zeroed placeholder result is used if omitted)
+            parallel: Run both subjects concurrently on disjoint CPU sets
+                when at least 4 CPUs are available
+        """
         print("\n" + "="*60)
         print("PERFORMANCE BENCHMARK")
         print("="*60)
@@ -129,28 +193,51 @@ class PerformanceBenchmark:
         prototxt = "detector/MobileNetSSD_deploy.prototxt"
         model = "detector/MobileNetSSD_deploy.caffemodel"
         
+        def build_command(script: str) -> list:
+            return [
+                "python", script,
+                "--prototxt", prototxt,
+                "--model", model,
+                "--input", video_path,
+                "--confidence", "0.4",
+                "--skip-frames", "30"
+            ]
+        
         # Original code
-        original_cmd = [
-            "python", "people_counter.py",
-            "--prototxt", prototxt,
-            "--model", model,
-            "--input", video_path,
-            "--confidence", "0.4",
-            "--skip-frames", "30"
-        ]
-        
-        original_results = self.measure_execution(original_cmd, "ORIGINAL")
-        
-        # Optimized code (placeholder)
-        optimized_results = {
-            'label': 'OPTIMIZED',
-            'duration': 0,
-            'fps': 0,
-            'cpu_avg': 0,
-            'memory_avg_mb': 0,
-            'memory_peak_mb': 0,
-            'memory_delta_mb': 0
-        }
+        original_cmd = build_command("people_counter.py")
+        
+        if optimized_script is None:
+            original_results = self.measure_execution(original_cmd, "ORIGINAL")
+            
+            # Optimized code (placeholder)
+            optimized_results = {
+                'label': 'OPTIMIZED',
+                'duration': 0,
+                'fps': 0,
+                'cpu_avg': 0,
+                'memory_avg_mb': 0,
+                'memory_peak_mb': 0,
+                'memory_delta_mb': 0
+            }
+        else:
+            optimized_cmd = build_command(optimized_script)
+            affinity_sets = self._split_affinity() if parallel else None
+            
+            if affinity_sets is not None:
+                # Independent processes on disjoint cores: run side by side
+                jobs = [
+                    (original_cmd, "ORIGINAL", 1.0, affinity_sets[0]),
+                    (optimized_cmd, "OPTIMIZED", 1.0, affinity_sets[1])
+                ]
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    original_results, optimized_results = executor.map(
+                        lambda job: self.measure_execution(*job), jobs
+                    )
+            else:
+                if parallel:
+                    print("⚠️  Fewer than 4 CPUs available, running sequentially")
+                original_results = self.measure_execution(original_cmd, "ORIGINAL")
+                optimized_results = self.measure_execution(optimized_cmd, "OPTIMIZED")
         
         # Save results
         with open(self.results_dir / "benchmark_results.json", "w") as f:
@@ -211,22 +298,31 @@ class PerformanceBenchmark:
 
 def main():
     """Main entry point."""
-    video_path = "utils/data/tests/test_1.mp4"
+    import argparse
     
-    if len(sys.argv) > 1:
-        video_path = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Performance Benchmark")
+    parser.add_argument("video", nargs="?", default="utils/data/tests/test_1.mp4",
+                        help="Input video file")
+    parser.add_argument("--optimized-script",
+                        help="Script to compare against people_counter.py")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Run both benchmarks concurrently on disjoint CPUs")
+    args = parser.parse_args()
+    video_path = args.video
     
     if not os.path.exists(video_path):
         print(f"❌ Video not found: {video_path}")
         sys.exit(1)
     
     benchmark = PerformanceBenchmark()
-    original, optimized = benchmark.benchmark(video_path)
+    original, optimized = benchmark.benchmark(
+        video_path,
+        optimized_script=args.optimized_script,
+        parallel=args.parallel
+    )
     benchmark.print_comparison(original, optimized)
 
 
 if __name__ == "__main__":
-    import json
-    import psutil
     main()
 
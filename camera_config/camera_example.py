@@ -6,8 +6,10 @@ with the people counting system
 
 import cv2
 import json
+import numpy as np
 import sys
 import os
+import threading
 from camera_manager import CameraConfigManager
 
 def load_camera_from_config(config_file: str):
@@ -18,43 +20,43 @@ def load_camera_from_config(config_file: str):
     
     try:
         # Load camera configuration
-        config = manager.load_camera_config(config_file)
-        
-        # Test RTSP connection
-        rtsp_ok, message = manager.test_rtsp_connection(config)
-        print(f"RTSP Connection Test: {message}")
-        
-        if not rtsp_ok:
-            print("Failed to connect to camera. Please check configuration.")
-            return None, None
+        config = manager.load_camera(config_file)
         
         # Get RTSP URL
-        rtsp_url = config["connection"]["full_url"]
+        rtsp_url = manager.build_rtsp_url(config)
         print(f"Connecting to: {rtsp_url}")
         
-        # Create OpenCV VideoCapture
-        cap = cv2.VideoCapture(rtsp_url)
+        # Create OpenCV VideoCapture, bounded like test_rtsp_connection
+        cap = manager.open_capture(rtsp_url)
         
         if not cap.isOpened():
             print("Failed to open video stream")
             return None, None
         
+        # The first read doubles as the connection test, so the camera
+        # only sees one RTSP handshake
+        ok, _ = cap.read()
+        if not ok:
+            cap.release()
+            print("Failed to connect to camera. Please check configuration.")
+            return None, None
+        
         # Set video properties from config
-        video_settings = config["video_settings"]
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, video_settings["resolution"]["width"])
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, video_settings["resolution"]["height"])
-        cap.set(cv2.CAP_PROP_FPS, video_settings["fps"])
+        video_settings = config.video_settings
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, video_settings.resolution.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, video_settings.resolution.height)
+        cap.set(cv2.CAP_PROP_FPS, video_settings.fps)
         
         print(f"Camera Info:")
-        print(f"  Brand: {config['camera_info']['brand']}")
-        print(f"  Model: {config['camera_info']['model']}")
-        print(f"  Company: {config['camera_info']['company']}")
-        print(f"  Alias: {config['camera_info']['alias']}")
-        print(f"  Location: {config['camera_info']['location']}")
-        print(f"  Address: {config['camera_info']['address']}")
-        print(f"  Map Location: {config['camera_info']['map_location']}")
-        print(f"  Resolution: {video_settings['resolution']['width']}x{video_settings['resolution']['height']}")
-        print(f"  FPS: {video_settings['fps']}")
+        print(f"  Brand: {config.camera_info.brand}")
+        print(f"  Model: {config.camera_info.model}")
+        print(f"  Company: {config.camera_info.company}")
+        print(f"  Alias: {config.camera_info.alias}")
+        print(f"  Location: {config.camera_info.location}")
+        print(f"  Address: {config.camera_info.address}")
+        print(f"  Map Location: {config.camera_info.map_location}")
+        print(f"  Resolution: {video_settings.resolution.width}x{video_settings.resolution.height}")
+        print(f"  FPS: {video_settings.fps}")
         
         return cap, config
         
@@ -62,43 +64,128 @@ def load_camera_from_config(config_file: str):
         print(f"Error loading camera configuration: {e}")
         return None, None
 
+class FrameGrabber(threading.Thread):
+    """Read frames in the background, keeping only the newest one
+    
+    When drawing/display is slower than the camera, frames would otherwise
+    pile up in the RTSP buffer and latency would keep growing. The FFmpeg
+    backend ignores CAP_PROP_BUFFERSIZE, so this thread is what bounds it.
+    
+    The grabber owns the capture and releases it once its loop exits, so
+    the capture is never released while a (possibly stalled) read is
+    still in progress.
+    """
+    
+    def __init__(self, cap):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.alive = True
+        self.latest = None
+        self.cond = threading.Condition()
+    
+    def run(self):
+        try:
+            while self.alive:
+                ok, frame = self.cap.read()
+                with self.cond:
+                    if ok:
+                        self.latest = frame
+                    else:
+                        self.alive = False
+                    self.cond.notify()
+        finally:
+            self.cap.release()
+    
+    def read(self, timeout=5.0):
+        """Return (ok, frame) for the newest frame not yet handed out"""
+        with self.cond:
+            if self.latest is None and self.alive:
+                self.cond.wait(timeout)
+            frame, self.latest = self.latest, None
+        return frame is not None, frame
+    
+    def stop(self):
+        """Ask the loop to exit; the thread releases the capture itself"""
+        self.alive = False
+        self.join(timeout=1.0)
+
 def draw_roi(frame, config):
     """Draw Region of Interest on frame"""
-    roi = config["detection_settings"]["roi"]
+    roi = config.detection_settings.roi
     
-    if roi["enabled"]:
-        points = roi["coordinates"]
-        pts = [(p["x"], p["y"]) for p in points]
+    if roi.enabled:
+        points = roi.coordinates
+        pts = np.array([(p.x, p.y) for p in points], dtype=np.int32)
         
         # Draw ROI polygon
         cv2.polylines(frame, [pts], True, (0, 255, 0), 2)
         
         # Draw ROI label
-        cv2.putText(frame, "ROI", (points[0]["x"], points[0]["y"] - 10),
+        cv2.putText(frame, "ROI", (points[0].x, points[0].y - 10),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
 def draw_counting_line(frame, config):
     """Draw counting line on frame"""
-    counting_line = config["detection_settings"]["counting_line"]
+    counting_line = config.detection_settings.counting_line
     
-    if counting_line["enabled"]:
-        start = counting_line["start_point"]
-        end = counting_line["end_point"]
+    if counting_line.enabled:
+        start = counting_line.start_point
+        end = counting_line.end_point
         
         # Draw counting line
-        cv2.line(frame, (start["x"], start["y"]), (end["x"], end["y"]), (255, 0, 0), 2)
+        cv2.line(frame, (start.x, start.y), (end.x, end.y), (255, 0, 0), 2)
         
         # Draw direction arrow
-        mid_x = (start["x"] + end["x"]) // 2
-        mid_y = (start["y"] + end["y"]) // 2
+        mid_x = (start.x + end.x) // 2
+        mid_y = (start.y + end.y) // 2
         
-        if counting_line["direction"] == "bidirectional":
+        if counting_line.direction == "bidirectional":
             cv2.putText(frame, "<->", (mid_x - 20, mid_y - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
         else:
             cv2.putText(frame, "->", (mid_x - 10, mid_y - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
 
+def draw_camera_info(frame, config):
+    """Draw camera brand/alias label on frame"""
+    alias = config.camera_info.alias or config.camera_info.model
+    camera_info = f"{config.camera_info.brand} {alias}"
+    cv2.putText(frame, camera_info, (10, frame.shape[0] - 20),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+def build_static_overlay(frame_shape, config):
+    """Render the per-config static drawings once
+    
+    ROI, counting line and camera label never change between frames, so
+    each is drawn once onto a blank layer and only its bounding rectangle
+    is kept. Copying those small patches through their masks is cheaper
+    than re-rasterizing, while a masked copy of the whole frame is not.
+    
+    Returns:
+        List of (region, patch, mask) tuples for apply_static_overlay
+    """
+    pieces = []
+    for draw in (draw_roi, draw_counting_line, draw_camera_info):
+        layer = np.zeros(frame_shape, dtype=np.uint8)
+        # Draw the same shape onto a layer of 1s; changed pixels form the mask
+        marker = np.full(frame_shape, 1, dtype=np.uint8)
+        draw(layer, config)
+        draw(marker, config)
+        changed = (marker != 1).any(axis=2)
+        ys, xs = np.nonzero(changed)
+        if len(ys) == 0:
+            continue
+        region = (slice(ys.min(), ys.max() + 1), slice(xs.min(), xs.max() + 1))
+        # full 3-channel mask: a broadcast (h, w, 1) mask is far slower
+        mask = np.repeat(changed[region][:, :, None], 3, axis=2)
+        pieces.append((region, layer[region].copy(), mask))
+    return pieces
+
+def apply_static_overlay(frame, pieces):
+    """Copy the cached overlay patches onto the frame, in drawing order"""
+    for region, patch, mask in pieces:
+        np.copyto(frame[region], patch, where=mask)
+
 def main():
     """Main function to demonstrate camera usage"""
     
@@ -119,10 +206,15 @@ def main():
     print("\nCamera stream started. Press 'q' to quit, 's' to save frame")
     
     frame_count = 0
+    overlay = None
+    overlay_shape = None
+    
+    grabber = FrameGrabber(cap)
+    grabber.start()
     
     try:
         while True:
-            ret, frame = cap.read()
+            ret, frame = grabber.read()
             
             if not ret:
                 print("Failed to read frame")
@@ -130,20 +222,16 @@ def main():
             
             frame_count += 1
             
-            # Draw ROI and counting line
-            draw_roi(frame, config)
-            draw_counting_line(frame, config)
+            # Draw ROI, counting line and camera info from the cached layer
+            if overlay is None or overlay_shape != frame.shape:
+                overlay = build_static_overlay(frame.shape, config)
+                overlay_shape = frame.shape
+            apply_static_overlay(frame, overlay)
             
             # Add frame counter
             cv2.putText(frame, f"Frame: {frame_count}", (10, 30),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
             
-            # Add camera info
-            alias = config['camera_info']['alias'] or config['camera_info']['model']
-            camera_info = f"{config['camera_info']['brand']} {alias}"
-            cv2.putText(frame, camera_info, (10, frame.shape[0] - 20),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
             # Display frame
             cv2.imshow("Camera Stream", frame)
             
@@ -163,7 +251,10 @@ def main():
     
     finally:
         # Cleanup
-        cap.release()
+        # The grabber releases cap when its read returns; if the stream
+        # has stalled it is left to the daemon thread rather than released
+        # underneath it
+        grabber.stop()
         cv2.destroyAllWindows()
         print("Camera stream stopped")
 
@@ -4,18 +4,213 @@ Camera Configuration Manager for Dahua RTSP Cameras
 Provides utilities to manage camera configurations and validate RTSP streams
 """
 
+import ipaddress
 import json
 import os
 import cv2
 import requests
-from typing import Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Dict, List, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+from dataclasses import dataclass, field, fields, is_dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from datetime import datetime
+from functools import lru_cache
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Required config fields, split into key paths once at import
+_REQUIRED_FIELDS = tuple(
+    (field_name, tuple(field_name.split('.')))
+    for field_name in (
+        "camera_info.brand",
+        "camera_info.model",
+        "connection.host",
+        "connection.username",
+        "connection.password",
+    )
+)
+_MISSING = object()
+
+
+@dataclass(frozen=True, slots=True)
+class CameraInfo:
+    """Camera identification and metadata"""
+    brand: str = "Dahua"
+    model: str = ""
+    serial_number: str = ""
+    company: str = "autoeyes"
+    alias: str = ""
+    location: str = ""
+    address: str = ""
+    map_location: str = ""
+    installation_date: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class Connection:
+    """RTSP connection settings"""
+    protocol: str = "rtsp"
+    host: str = "192.168.1.100"
+    port: int = 554
+    username: str = "admin"
+    password: str = "admin"
+    stream_path: str = "/cam/realmonitor?channel=1&subtype=0"
+
+    @property
+    def full_url(self) -> str:
+        """RTSP URL built from the current connection fields"""
+        return f"rtsp://{self.username}:{self.password}@{self.host}:{self.port}{self.stream_path}"
+
+
+@dataclass(frozen=True, slots=True)
+class Resolution:
+    width: int = 1920
+    height: int = 1080
+
+
+@dataclass(frozen=True, slots=True)
+class VideoSettings:
+    """Video stream configuration"""
+    resolution: Resolution = field(default_factory=Resolution)
+    fps: int = 25
+    codec: str = "H.264"
+
+
+@dataclass(frozen=True, slots=True)
+class Point:
+    x: int = 0
+    y: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class Roi:
+    """Region of interest polygon"""
+    enabled: bool = True
+    coordinates: Tuple[Point, ...] = (
+        Point(100, 100), Point(800, 100), Point(800, 600), Point(100, 600)
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class CountingLine:
+    """Virtual line for counting crossings"""
+    enabled: bool = True
+    start_point: Point = Point(0, 300)
+    end_point: Point = Point(1920, 300)
+    direction: str = "bidirectional"
+
+
+@dataclass(frozen=True, slots=True)
+class DetectionSettings:
+    """People detection and counting configuration"""
+    roi: Roi = field(default_factory=Roi)
+    counting_line: CountingLine = field(default_factory=CountingLine)
+    sensitivity: float = 0.5
+    min_object_size: int = 30
+    max_object_size: int = 200
+
+
+@dataclass(frozen=True, slots=True)
+class Alerts:
+    enabled: bool = True
+    threshold: int = 5
+    cooldown_period: int = 60
+
+
+@dataclass(frozen=True, slots=True)
+class Network:
+    timeout: int = 30
+    retry_attempts: int = 3
+
+
+@dataclass(frozen=True, slots=True)
+class Maintenance:
+    status: str = "active"
+    health_check_interval: int = 300
+
+
+@dataclass(frozen=True, slots=True)
+class CameraConfig:
+    """Immutable camera configuration
+    
+    Mirrors the JSON layout; documentation keys ("_comment", "_doc_*")
+    and unknown keys are ignored when loading.
+    """
+    camera_info: CameraInfo = field(default_factory=CameraInfo)
+    connection: Connection = field(default_factory=Connection)
+    video_settings: VideoSettings = field(default_factory=VideoSettings)
+    detection_settings: DetectionSettings = field(default_factory=DetectionSettings)
+    alerts: Alerts = field(default_factory=Alerts)
+    network: Network = field(default_factory=Network)
+    maintenance: Maintenance = field(default_factory=Maintenance)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CameraConfig":
+        """Build a config from its JSON dictionary form"""
+        return _from_dict(cls, data)
+
+    def to_dict(self) -> Dict:
+        """Convert to the JSON dictionary form"""
+        return _to_dict(self)
+
+
+def _from_dict(cls, data: Dict):
+    """Recursively build a config dataclass, skipping unknown keys"""
+    hints = get_type_hints(cls)
+    kwargs = {}
+    for f in fields(cls):
+        if f.name not in data:
+            continue
+        value, hint = data[f.name], hints[f.name]
+        if is_dataclass(hint):
+            value = _from_dict(hint, value)
+        elif get_origin(hint) is tuple and is_dataclass(get_args(hint)[0]):
+            value = tuple(_from_dict(get_args(hint)[0], item) for item in value)
+        kwargs[f.name] = value
+    return cls(**kwargs)
+
+
+def _to_dict(obj) -> Any:
+    """Recursively convert config dataclasses to plain dicts/lists"""
+    if is_dataclass(obj):
+        return {f.name: _to_dict(getattr(obj, f.name)) for f in fields(obj)}
+    if isinstance(obj, tuple):
+        return [_to_dict(item) for item in obj]
+    return obj
+
+
+def _file_key(config_path: str) -> Tuple[int, int]:
+    """Cache key for a config file: (mtime in ns, size)
+
+    The size catches rewrites that land within the filesystem's
+    timestamp resolution and so leave the mtime unchanged.
+    """
+    st = os.stat(config_path)
+    return st.st_mtime_ns, st.st_size
+
+
+@lru_cache(maxsize=128)
+def _read_config_bytes(config_path: str, key: Tuple[int, int]) -> bytes:
+    """Read a config file once per (path, key) pair"""
+    with open(config_path, 'rb') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=128)
+def _load_json_cached(config_path: str, key: Tuple[int, int]) -> Dict:
+    """Parse a config file once per (path, key) pair; treat as read-only"""
+    return json.loads(_read_config_bytes(config_path, key))
+
+
+@lru_cache(maxsize=128)
+def _load_camera_cached(config_path: str, key: Tuple[int, int]) -> CameraConfig:
+    """Build the immutable config once per (path, key) pair"""
+    return CameraConfig.from_dict(_load_json_cached(config_path, key))
+
 
 class CameraConfigManager:
     """Manages camera configurations for Dahua RTSP cameras"""
@@ -23,6 +218,16 @@ class CameraConfigManager:
     def __init__(self, config_dir: str = "camera_config"):
         self.config_dir = config_dir
         self.ensure_config_dir()
+        
+        # Pooled session so repeated health checks reuse connections
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
     
     def ensure_config_dir(self) -> None:
         """Ensure the camera config directory exists"""
@@ -35,8 +240,12 @@ class CameraConfigManager:
         config_path = os.path.join(self.config_dir, config_file)
         
         try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            # The file bytes are cached by mtime and size so edits on disk
+            # are picked up; parsing them again is cheaper than a deepcopy
+            # and gives each caller its own dict to mutate
+            config = json.loads(
+                _read_config_bytes(config_path, _file_key(config_path))
+            )
             logger.info(f"Loaded camera config: {config_file}")
             return config
         except FileNotFoundError:
@@ -46,9 +255,22 @@ class CameraConfigManager:
             logger.error(f"Invalid JSON in config file {config_file}: {e}")
             raise
     
-    def save_camera_config(self, config: Dict, config_file: str) -> None:
+    def load_camera(self, config_file: str) -> CameraConfig:
+        """Load camera configuration as an immutable CameraConfig"""
+        config_path = os.path.join(self.config_dir, config_file)
+        try:
+            config = _load_camera_cached(config_path, _file_key(config_path))
+        except FileNotFoundError:
+            logger.error(f"Config file not found: {config_path}")
+            raise
+        logger.info(f"Loaded camera config: {config_file}")
+        return config
+    
+    def save_camera_config(self, config: Union[CameraConfig, Dict], config_file: str) -> None:
         """Save camera configuration to JSON file"""
         config_path = os.path.join(self.config_dir, config_file)
+        if isinstance(config, CameraConfig):
+            config = config.to_dict()
         
         try:
             with open(config_path, 'w') as f:
@@ -69,78 +291,73 @@ class CameraConfigManager:
                            location: str = "",
                            address: str = "",
                            map_location: str = "",
-                           serial_number: str = "") -> Dict:
+                           serial_number: str = "") -> CameraConfig:
         """Create a new camera configuration"""
+        return CameraConfig(
+            camera_info=CameraInfo(
+                brand=brand,
+                model=model,
+                serial_number=serial_number,
+                company=company,
+                alias=alias,
+                location=location,
+                address=address,
+                map_location=map_location,
+                installation_date=datetime.now().strftime("%Y-%m-%d")
+            ),
+            connection=Connection(
+                host=host,
+                username=username,
+                password=password
+            )
+        )
+    
+    def build_rtsp_url(self, config: Union[CameraConfig, Dict]) -> str:
+        """Build the RTSP URL from the connection fields
         
-        config = {
-            "camera_info": {
-                "brand": brand,
-                "model": model,
-                "serial_number": serial_number,
-                "company": company,
-                "alias": alias,
-                "location": location,
-                "address": address,
-                "map_location": map_location,
-                "installation_date": datetime.now().strftime("%Y-%m-%d")
-            },
-            "connection": {
-                "protocol": "rtsp",
-                "host": host,
-                "port": 554,
-                "username": username,
-                "password": password,
-                "stream_path": "/cam/realmonitor?channel=1&subtype=0",
-                "full_url": f"rtsp://{username}:{password}@{host}:554/cam/realmonitor?channel=1&subtype=0"
-            },
-            "video_settings": {
-                "resolution": {"width": 1920, "height": 1080},
-                "fps": 25,
-                "codec": "H.264"
-            },
-            "detection_settings": {
-                "roi": {
-                    "enabled": True,
-                    "coordinates": [
-                        {"x": 100, "y": 100},
-                        {"x": 800, "y": 100},
-                        {"x": 800, "y": 600},
-                        {"x": 100, "y": 600}
-                    ]
-                },
-                "counting_line": {
-                    "enabled": True,
-                    "start_point": {"x": 0, "y": 300},
-                    "end_point": {"x": 1920, "y": 300},
-                    "direction": "bidirectional"
-                },
-                "sensitivity": 0.5,
-                "min_object_size": 30,
-                "max_object_size": 200
-            },
-            "alerts": {
-                "enabled": True,
-                "threshold": 5,
-                "cooldown_period": 60
-            },
-            "network": {
-                "timeout": 30,
-                "retry_attempts": 3
-            },
-            "maintenance": {
-                "status": "active",
-                "health_check_interval": 300
-            }
-        }
+        The URL is never stored, so it cannot go stale when the
+        username or password is edited.
+        """
+        if isinstance(config, CameraConfig):
+            return config.connection.full_url
+        return _from_dict(Connection, config["connection"]).full_url
+    
+    def test_rtsp_connection(self, config: Union[CameraConfig, Dict], timeout: float = 5.0) -> Tuple[bool, str]:
+        """Test RTSP connection to camera, giving up after ``timeout`` seconds"""
+        rtsp_url = self.build_rtsp_url(config)
         
-        return config
+        # The probe itself is bounded by the open/read timeouts passed in
+        # open_capture; the deadline here only returns control early when
+        # a backend ignores them. Executor workers are not daemon threads,
+        # so a probe that is still stuck will hold up interpreter exit
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            future = executor.submit(self._probe_rtsp, rtsp_url, timeout)
+            return future.result(timeout=timeout + 1)
+        except FuturesTimeout:
+            return False, f"RTSP connection timed out after {timeout:.0f}s"
+        finally:
+            executor.shutdown(wait=False)
     
-    def test_rtsp_connection(self, config: Dict) -> Tuple[bool, str]:
-        """Test RTSP connection to camera"""
-        rtsp_url = config["connection"]["full_url"]
+    def open_capture(self, rtsp_url: str, timeout: float = 5.0) -> cv2.VideoCapture:
+        """Open an RTSP stream with open/read timeouts of ``timeout`` seconds
         
+        Without them an unreachable camera blocks for the OS connect
+        timeout. OpenCV builds that predate the timeout properties fall
+        back to a plain capture.
+        """
+        if hasattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC"):
+            timeout_ms = int(timeout * 1000)
+            return cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms
+            ])
+        return cv2.VideoCapture(rtsp_url)
+    
+    def _probe_rtsp(self, rtsp_url: str, timeout: float) -> Tuple[bool, str]:
+        """Open the RTSP stream and read a single frame"""
         try:
-            cap = cv2.VideoCapture(rtsp_url)
+            cap = self.open_capture(rtsp_url, timeout)
             
             if not cap.isOpened():
                 return False, "Failed to open RTSP stream"
@@ -157,14 +374,42 @@ class CameraConfigManager:
         except Exception as e:
             return False, f"RTSP connection error: {str(e)}"
     
-    def test_http_connection(self, config: Dict) -> Tuple[bool, str]:
+    def test_all(self, config_files: List[str]) -> Dict[str, Tuple[bool, str]]:
+        """Test RTSP connections for several cameras concurrently"""
+        results = {}
+        if not config_files:
+            return results
+        
+        # Probes are almost entirely network wait, so fan them out
+        with ThreadPoolExecutor(max_workers=min(16, len(config_files))) as executor:
+            futures = {}
+            for config_file in config_files:
+                try:
+                    config = self.load_camera_config(config_file)
+                except (OSError, json.JSONDecodeError) as e:
+                    results[config_file] = (False, f"Error loading config - {e}")
+                    continue
+                futures[executor.submit(self.test_rtsp_connection, config)] = config_file
+            
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = (False, f"RTSP connection error: {str(e)}")
+        
+        return results
+    
+    def test_http_connection(self, config: Union[CameraConfig, Dict]) -> Tuple[bool, str]:
         """Test HTTP connection to camera web interface"""
+        if isinstance(config, CameraConfig):
+            config = config.to_dict()
         host = config["connection"]["host"]
-        port = config["network"]["http_port"]
+        # CameraConfig has no http_port, so fall back to the default port
+        port = config["network"].get("http_port", 80)
         
         try:
             url = f"http://{host}:{port}"
-            response = requests.get(url, timeout=10)
+            response = self._session.get(url, timeout=(3, 7))
             
             if response.status_code == 200:
                 return True, "HTTP connection successful"
@@ -174,29 +419,23 @@ class CameraConfigManager:
         except Exception as e:
             return False, f"HTTP connection error: {str(e)}"
     
-    def validate_config(self, config: Dict) -> List[str]:
+    def validate_config(self, config: Union[CameraConfig, Dict]) -> List[str]:
         """Validate camera configuration"""
+        if isinstance(config, CameraConfig):
+            config = config.to_dict()
         errors = []
         
         # Check required fields
-        required_fields = [
-            "camera_info.brand",
-            "camera_info.model",
-            "connection.host",
-            "connection.username",
-            "connection.password"
-        ]
-        
-        for field in required_fields:
-            keys = field.split('.')
+        for field_name, path in _REQUIRED_FIELDS:
             current = config
-            try:
-                for key in keys:
-                    current = current[key]
-                if not current:
-                    errors.append(f"Missing or empty field: {field}")
-            except KeyError:
-                errors.append(f"Missing field: {field}")
+            for key in path:
+                current = current.get(key, _MISSING) if isinstance(current, dict) else _MISSING
+                if current is _MISSING:
+                    break
+            if current is _MISSING:
+                errors.append(f"Missing field: {field_name}")
+            elif not current:
+                errors.append(f"Missing or empty field: {field_name}")
         
         # Validate IP address format
         host = config.get("connection", {}).get("host", "")
@@ -218,14 +457,10 @@ class CameraConfigManager:
     
     def is_valid_ip(self, ip: str) -> bool:
         """Validate IP address format"""
-        parts = ip.split('.')
-        if len(parts) != 4:
-            return False
-        
+        # Unlike socket.inet_aton, ipaddress rejects shorthand forms
+        # ("10.1") and leading-zero/hex octets
         try:
-            for part in parts:
-                if not (0 <= int(part) <= 255):
-                    return False
+            ipaddress.IPv4Address(ip)
             return True
         except ValueError:
             return False
@@ -241,8 +476,27 @@ class CameraConfigManager:
         
         return sorted(config_files)
     
-    def get_camera_info(self, config: Dict) -> Dict:
+    def _peek_info(self, config_file: str) -> Dict:
+        """Read only the fields shown by ``--list``
+        
+        Reads straight from the parsed-JSON cache, so listing skips the
+        fresh parse that load_camera_config makes of every file.
+        """
+        config_path = os.path.join(self.config_dir, config_file)
+        raw = _load_json_cached(config_path, _file_key(config_path))
+        camera_info = raw["camera_info"]
+        return {
+            "brand": camera_info["brand"],
+            "model": camera_info["model"],
+            "alias": camera_info["alias"],
+            "location": camera_info["location"],
+            "host": raw["connection"]["host"]
+        }
+    
+    def get_camera_info(self, config: Union[CameraConfig, Dict]) -> Dict:
         """Extract camera information for display"""
+        if isinstance(config, CameraConfig):
+            config = config.to_dict()
         return {
             "brand": config["camera_info"]["brand"],
             "model": config["camera_info"]["model"],
@@ -253,7 +507,7 @@ class CameraConfigManager:
             "map_location": config["camera_info"]["map_location"],
             "host": config["connection"]["host"],
             "status": config["maintenance"]["status"],
-            "rtsp_url": config["connection"]["full_url"]
+            "rtsp_url": self.build_rtsp_url(config)
         }
 
 
@@ -264,6 +518,7 @@ def main():
     parser = argparse.ArgumentParser(description="Camera Configuration Manager")
     parser.add_argument("--create", help="Create new camera config")
     parser.add_argument("--test", help="Test camera connection")
+    parser.add_argument("--test-all", action="store_true", help="Test RTSP connection for all camera configs")
     parser.add_argument("--list", action="store_true", help="List all camera configs")
     parser.add_argument("--validate", help="Validate camera config")
     
@@ -308,13 +563,19 @@ def main():
         print(f"RTSP Test: {'✓' if rtsp_ok else '✗'} {rtsp_msg}")
         print(f"HTTP Test: {'✓' if http_ok else '✗'} {http_msg}")
     
+    elif args.test_all:
+        results = manager.test_all(manager.list_camera_configs())
+        print("RTSP connection tests:")
+        for config_file in sorted(results):
+            rtsp_ok, rtsp_msg = results[config_file]
+            print(f"  {config_file}: {'✓' if rtsp_ok else '✗'} {rtsp_msg}")
+    
     elif args.list:
         configs = manager.list_camera_configs()
         print("Available camera configurations:")
         for config_file in configs:
             try:
-                config = manager.load_camera_config(config_file)
-                info = manager.get_camera_info(config)
+                info = manager._peek_info(config_file)
                 alias_text = f" ({info['alias']})" if info['alias'] else ""
                 location_text = f" - {info['location']}" if info['location'] else ""
                 print(f"  {config_file}: {info['brand']} {info['model']}{alias_text}{location_text} at {info['host']}")
@@ -99,14 +99,31 @@ class ComprehensiveVerifier:
             memory_samples = []
             max_duration = 120
             
+            min_sample_interval = 1.0  # psutil needs >=0.1s between cpu_percent() calls
+            try:
+                proc = psutil.Process(process.pid)
+                proc.cpu_percent(None)
+            except psutil.NoSuchProcess:
+                proc = None
+            last_sample = time.monotonic()
+            
             elapsed = 0
             while process.poll() is None and elapsed < max_duration:
                 time.sleep(0.1)
                 elapsed = time.time() - start_time
+                if proc is None:
+                    continue
+                
+                # Only hit /proc once per sampling window; the 0.1s loop
+                # above is just the liveness check
+                now = time.monotonic()
+                if now - last_sample < min_sample_interval:
+                    continue
+                last_sample = now
                 
                 try:
-                    cpu_pct = process.cpu_percent()
-                    memory_mb = self._get_process_memory(process.pid)
+                    cpu_pct = proc.cpu_percent()
+                    memory_mb = proc.memory_info().rss / 1024 / 1024
                     if memory_mb > 0:
                         cpu_samples.append(cpu_pct)
                         memory_samples.append(memory_mb)
@@ -161,14 +178,6 @@ class ComprehensiveVerifier:
         process = psutil.Process()
         return process.memory_info().rss / 1024 / 1024
     
-    def _get_process_memory(self, pid: int) -> float:
-        """Get memory usage for specific process."""
-        try:
-            process = psutil.Process(pid)
-            return process.memory_info().rss / 1024 / 1024
-        except:
-            return 0
-    
     def _parse_output(self, output: str) -> Tuple[int, int, float]:
         """Parse output to extract counting results."""
         total_in = 0
@@ -18,6 +18,7 @@ class Detection:
     CONFIDENCE_THRESHOLD: float = 0.4    # Minimum confidence for detection
     SKIP_FRAMES: int = 30                # Frames to skip between detections
     FRAME_WIDTH: int = 500                # Resized frame width
+    INPUT_SIZE: int = 300                 # MobileNetSSD native input size
     BLOB_SCALE: float = 0.007843         # Blob scaling factor
     BLOB_MEAN: float = 127.5              # Blob mean subtraction
 
@@ -47,6 +47,20 @@ def parse_arguments():
         help='Path to Caffe model file'
     )
 
+    parser.add_argument(
+        '-b', '--backend',
+        type=str,
+        default='cpu',
+        choices=['cpu', 'opencl', 'cuda'],
+        help='DNN inference backend (falls back to CPU if unavailable)'
+    )
+
+    parser.add_argument(
+        '--fp16',
+        action='store_true',
+        help='Use half precision on the cuda/opencl backends'
+    )
+
     parser.add_argument(
         '-w', '--workers',
         type=int,
@@ -126,7 +140,9 @@ def main():
         logger.info("Loading model...")
         counter.load_model(
             prototxt=args.prototxt,
-            model=args.model
+            model=args.model,
+            backend=args.backend,
+            fp16=args.fp16
         )
 
         # Load configuration if provided
@@ -11,9 +11,8 @@ import time
 from threading import Thread
 from queue import Queue, Empty
 from typing import Dict, List, Any, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from parallel.worker import PeopleCounterWorker
+from parallel.worker import PeopleCounterWorker, thread
 from parallel.utils.result_handler import ResultHandler
 from parallel.utils.logger import ParallelLogger
 
@@ -79,17 +78,23 @@ class ParallelPeopleCounter:
 
         logger.info(f"Initialized ParallelPeopleCounter with {worker_count} workers")
 
-    def load_model(self, prototxt: str, model: str):
+    def load_model(self, prototxt: str, model: str, backend: str = "cpu", fp16: bool = False):
         """
         Load MobileNetSSD model.
 
         Args:
             prototxt: Path to prototxt file
             model: Path to model file
+            backend: Inference backend ("cpu", "opencl" or "cuda");
+                unavailable devices fall back to the next option
+            fp16: Run GPU inference in half precision (no effect on CPU)
         """
         logger.info("Loading MobileNetSSD model...")
         self.net = cv2.dnn.readNetFromCaffe(prototxt, model)
-        logger.info("Model loaded successfully")
+        used = thread.configure_backend(self.net, backend, fp16)
+        if used != backend:
+            logger.warning(f"{backend} not available, falling back to {used}")
+        logger.info(f"Model loaded successfully ({used} backend)")
 
     def add_camera(
         self,
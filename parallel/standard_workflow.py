@@ -8,11 +8,11 @@ Workflow chuẩn được trích xuất từ people_counter.py để đảm bả
 
 import cv2
 import numpy as np
-import imutils
 import dlib
 import datetime
 from tracker.centroidtracker import CentroidTracker
 from tracker.trackableobject import TrackableObject
+from constants import Detection
 from imutils.video import FPS
 
 
@@ -76,6 +76,10 @@ class StandardPeopleCountingWorkflow:
         W = None
         H = None
         
+        # Buffers for the resized and RGB frames, reused every iteration
+        resized = None
+        rgb = None
+        
         # Main loop - EXACT from original (lines 125-342)
         while True:
             # Grab the next frame (lines 129-130) - EXACT ORIGINAL LOGIC
@@ -87,8 +91,11 @@ class StandardPeopleCountingWorkflow:
                 break
             
             # Resize frame (lines 137-141)
-            frame = imutils.resize(frame, width=500)
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            (h, w) = frame.shape[:2]
+            resized = cv2.resize(frame, (500, int(h * (500 / float(w)))), resized,
+                                 interpolation=cv2.INTER_AREA)
+            frame = resized
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, rgb)
             
             # Set frame dimensions (lines 143-145)
             if W is None or H is None:
@@ -108,30 +115,25 @@ class StandardPeopleCountingWorkflow:
                 status = "Detecting"
                 trackers = []
                 
-                # Convert frame to blob (lines 167-171)
-                blob = cv2.dnn.blobFromImage(frame, 0.007843, (W, H), 127.5)
+                # Convert frame to blob (lines 167-171), native 300x300 input
+                blob = cv2.dnn.blobFromImage(frame, 0.007843, (Detection.INPUT_SIZE, Detection.INPUT_SIZE), 127.5)
                 self.net.setInput(blob)
                 detections = self.net.forward()
                 
-                # Loop over detections (lines 174-204)
-                for i in np.arange(0, detections.shape[2]):
-                    confidence = detections[0, 0, i, 2]
-                    
-                    if confidence > args["confidence"]:
-                        idx = int(detections[0, 0, i, 1])
-                        
-                        if self.CLASSES[idx] != "person":
-                            continue
-                        
-                        # Compute bounding box coordinates (lines 190-193)
-                        box = detections[0, 0, i, 3:7] * np.array([W, H, W, H])
-                        (startX, startY, endX, endY) = box.astype("int")
-                        
-                        # Create tracker (lines 195-204)
-                        tracker = dlib.correlation_tracker()
-                        rect = dlib.rectangle(startX, startY, endX, endY)
-                        tracker.start_track(rgb, rect)
-                        trackers.append(tracker)
+                # Filter detections (lines 174-204): confident "person" only
+                d = detections[0, 0]
+                keep = (d[:, 2] > args["confidence"]) & \
+                    (d[:, 1].astype(np.int32) == self.CLASSES.index("person"))
+                
+                # Compute bounding box coordinates (lines 190-193)
+                boxes = (d[keep, 3:7] * np.array([W, H, W, H])).astype("int")
+                
+                for (startX, startY, endX, endY) in boxes.tolist():
+                    # Create tracker (lines 195-204)
+                    tracker = dlib.correlation_tracker()
+                    rect = dlib.rectangle(startX, startY, endX, endY)
+                    tracker.start_track(rgb, rect)
+                    trackers.append(tracker)
             
             # Update trackers (lines 206-227) - EXACT ORIGINAL
             else:
@@ -153,6 +155,11 @@ class StandardPeopleCountingWorkflow:
             # Update centroid tracker (lines 235-237)
             objects = ct.update(rects)
             
+            # Prune objects deregistered by the centroid tracker
+            if len(trackableObjects) > len(objects):
+                for objectID in [i for i in trackableObjects if i not in objects]:
+                    del trackableObjects[objectID]
+            
             # Process tracked objects (lines 240-294) - EXACT ORIGINAL LOGIC
             for (objectID, centroid) in objects.items():
                 to = trackableObjects.get(objectID, None)
@@ -161,9 +168,8 @@ class StandardPeopleCountingWorkflow:
                     to = TrackableObject(objectID, centroid)
                 else:
                     # Calculate direction (lines 252-258)
-                    y = [c[1] for c in to.centroids]
-                    direction = centroid[1] - np.mean(y)
-                    to.centroids.append(centroid)
+                    direction = centroid[1] - to.mean_y()
+                    to.add_centroid(centroid)
                     
                     # Counting logic (lines 260-293)
                     if not to.counted:
@@ -9,7 +9,6 @@ import cv2
 import dlib
 import time
 import numpy as np
-import imutils
 import datetime
 from threading import Thread
 from queue import Queue, Empty
@@ -26,8 +25,8 @@ if parent_dir not in sys.path:
 
 from tracker.centroidtracker import CentroidTracker
 from tracker.trackableobject import TrackableObject
+from constants import Detection
 from imutils.video import VideoStream, FPS
-from parallel.standard_workflow import StandardPeopleCountingWorkflow
 
 # Import thread module from parent utils directory
 import importlib.util
@@ -175,7 +174,8 @@ class PeopleCounterWorker(Thread):
 
         # Initialize video capture
         try:
-            vs = cv2.VideoCapture(video_path)
+            # prefetch decoded frames while the current one is processed
+            vs = thread.FrameReader(thread.open_video(video_path))
         except Exception as e:
             logger.error(f"[WORKER-{self.worker_id}] Failed to open video {video_id}: {e}")
             return
@@ -241,13 +241,19 @@ class PeopleCounterWorker(Thread):
         skip_frames = self.task_config.get('skip_frames', 30)
         confidence = self.task_config.get('confidence', 0.4)
         
-        # DEBUG: Enable detailed logging for this worker
-        logger.setLevel(logging.DEBUG)
-        logger.info(f"[DEBUG-WORKER-{self.worker_id}] Initialized with skip_frames={skip_frames}, confidence={confidence}")
+        # Per-frame debug messages are only formatted when DEBUG is enabled
+        # (the level follows --log-level instead of being forced here)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        logger.info(f"[WORKER-{self.worker_id}] Initialized with skip_frames={skip_frames}, confidence={confidence}")
 
         W = None
         H = None
 
+        # Resize/RGB buffers reused across frames (nothing keeps a frame
+        # past its own iteration here)
+        resized = None
+        rgb = None
+
         # Main processing loop
         try:
             while True:
@@ -271,8 +277,12 @@ class PeopleCounterWorker(Thread):
                         continue  # Camera might return None occasionally
 
                 # Resize frame - EXACT from original line 140
-                frame = imutils.resize(frame, width=500)
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                # same output as imutils.resize(frame, width=500)
+                (h, w) = frame.shape[:2]
+                resized = cv2.resize(frame, (500, int(h * (500 / float(w)))), resized,
+                                     interpolation=cv2.INTER_AREA)
+                frame = resized
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, rgb)
 
                 # Get frame dimensions - EXACT from original line 144-145
                 if W is None or H is None:
@@ -287,42 +297,33 @@ class PeopleCounterWorker(Thread):
                     status = "Detecting"
                     trackers = []
 
-                    # Create blob and get detections
-                    blob = cv2.dnn.blobFromImage(frame, 0.007843, (W, H), 127.5)
+                    # Create blob at the model's native 300x300 and get detections
+                    blob = cv2.dnn.blobFromImage(frame, 0.007843, (Detection.INPUT_SIZE, Detection.INPUT_SIZE), 127.5)
                     self.net.setInput(blob)
                     detections = self.net.forward()
-                    logger.debug(f"[DEBUG-WORKER-{self.worker_id}] Frame {totalFrames}: Starting detection, detections shape: {detections.shape}")
-
-                    # Process detections
-                    for i in np.arange(0, detections.shape[2]):
-                        confidence_score = detections[0, 0, i, 2]
-
-                        if confidence_score > confidence:
-                            idx = int(detections[0, 0, i, 1])
-
-                            if CLASSES[idx] != "person":
-                                continue
-
-                            # Get bounding box
-                            box = detections[0, 0, i, 3:7] * np.array([W, H, W, H])
-                            
-                            # Handle NaN and invalid values
-                            if np.any(np.isnan(box)) or np.any(np.isinf(box)):
-                                continue
-                            
-                            # Handle overflow
-                            box = np.clip(box, -999999, 999999)
-                            startX, startY, endX, endY = [int(c) for c in box]
-                            
-                            # Validate bounding box
-                            if endX <= startX or endY <= startY or startX < 0 or startY < 0:
-                                continue
-
-                            # Create dlib tracker
-                            tracker = dlib.correlation_tracker()
-                            rect = dlib.rectangle(startX, startY, endX, endY)
-                            tracker.start_track(rgb, rect)
-                            trackers.append(tracker)
+                    if debug:
+                        logger.debug(f"[DEBUG-WORKER-{self.worker_id}] Frame {totalFrames}: Starting detection, detections shape: {detections.shape}")
+
+                    # Process detections: keep confident "person" boxes
+                    d = detections[0, 0]
+                    keep = (d[:, 2] > confidence) & \
+                        (d[:, 1].astype(np.int32) == CLASSES.index("person"))
+                    boxes = d[keep, 3:7] * np.array([W, H, W, H])
+
+                    # Handle NaN/inf values and overflow
+                    boxes = boxes[np.isfinite(boxes).all(axis=1)]
+                    boxes = np.clip(boxes, -999999, 999999).astype(int)
+
+                    # Validate bounding boxes
+                    valid = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1]) & \
+                        (boxes[:, 0] >= 0) & (boxes[:, 1] >= 0)
+
+                    for (startX, startY, endX, endY) in boxes[valid].tolist():
+                        # Create dlib tracker
+                        tracker = dlib.correlation_tracker()
+                        rect = dlib.rectangle(startX, startY, endX, endY)
+                        tracker.start_track(rgb, rect)
+                        trackers.append(tracker)
 
                 else:
                     # Update trackers
@@ -340,7 +341,7 @@ class PeopleCounterWorker(Thread):
                         rects.append((startX, startY, endX, endY))
                         rects_updated += 1
                     
-                    if rects_updated > 0 and totalFrames % 30 == 0:
+                    if debug and rects_updated > 0 and totalFrames % 30 == 0:
                         logger.debug(f"[DEBUG-WORKER-{self.worker_id}] Frame {totalFrames}: Tracking {rects_updated} objects")
 
                 # Draw center line
@@ -349,6 +350,11 @@ class PeopleCounterWorker(Thread):
                 # Update centroid tracker
                 objects = ct.update(rects)
 
+                # Drop state for deregistered IDs so long camera runs stay bounded
+                if len(trackableObjects) > len(objects):
+                    for objectID in [i for i in trackableObjects if i not in objects]:
+                        del trackableObjects[objectID]
+
                 # Process tracked objects
                 for (objectID, centroid) in objects.items():
                     to = trackableObjects.get(objectID, None)
@@ -356,9 +362,8 @@ class PeopleCounterWorker(Thread):
                     if to is None:
                         to = TrackableObject(objectID, centroid)
                     else:
-                        y = [c[1] for c in to.centroids]
-                        direction = centroid[1] - np.mean(y)
-                        to.centroids.append(centroid)
+                        direction = centroid[1] - to.mean_y()
+                        to.add_centroid(centroid)
 
                         # Count object movement only once
                         if not to.counted:
@@ -375,7 +380,8 @@ class PeopleCounterWorker(Thread):
                                 move_out.append(totalUp)  # Record the OUT event
                                 out_time.append(date_time)  # Record timestamp
                                 to.counted = True  # Mark object as counted to prevent double-counting
-                                logger.debug(f"[WORKER-{self.worker_id}] Frame {totalFrames}: OUT event for ObjectID={objectID}, direction={direction:.2f}, centroid_y={centroid[1]}, totalUp={totalUp}")
+                                if debug:
+                                    logger.debug(f"[WORKER-{self.worker_id}] Frame {totalFrames}: OUT event for ObjectID={objectID}, direction={direction:.2f}, centroid_y={centroid[1]}, totalUp={totalUp}")
 
                             # CASE 2: Moving DOWN and below center line → Person going IN
                             elif direction > 0 and centroid[1] > H // 2:
@@ -384,13 +390,14 @@ class PeopleCounterWorker(Thread):
                                 move_in.append(totalDown)  # Record the IN event
                                 in_time.append(date_time)  # Record timestamp
                                 # Check threshold for alert (line 281 in original)
-                                if sum(total) >= threshold:
+                                if debug and sum(total) >= threshold:
                                     logger.debug(f"[WORKER-{self.worker_id}] Threshold exceeded: {sum(total)} >= {threshold}")
                                 to.counted = True  # Mark object as counted to prevent double-counting
                                 # Compute total people inside (EXACT COPY FROM ORIGINAL LINE 292-293)
                                 total = []
                                 total.append(len(move_in) - len(move_out))
-                                logger.debug(f"[WORKER-{self.worker_id}] Frame {totalFrames}: IN event for ObjectID={objectID}, direction={direction:.2f}, centroid_y={centroid[1]}, totalDown={totalDown}, current_total={total[0]}")
+                                if debug:
+                                    logger.debug(f"[WORKER-{self.worker_id}] Frame {totalFrames}: IN event for ObjectID={objectID}, direction={direction:.2f}, centroid_y={centroid[1]}, totalDown={totalDown}, current_total={total[0]}")
 
                     trackableObjects[objectID] = to
 
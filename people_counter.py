@@ -1,11 +1,13 @@
 from tracker.centroidtracker import CentroidTracker
 from tracker.trackableobject import TrackableObject
+from constants import Detection
 from imutils.video import VideoStream
 from itertools import zip_longest
 from utils.mailer import Mailer
 from imutils.video import FPS
 from utils import thread
 from typing import Dict, Any, List, Tuple, Optional
+from functools import lru_cache
 import numpy as np
 import threading
 import argparse
@@ -40,6 +42,9 @@ def parse_arguments() -> Dict[str, Any]:
         - output: Output video file path
         - confidence: Detection confidence threshold
         - skip_frames: Number of frames to skip between detections
+        - backend: DNN inference backend (cpu, opencl or cuda)
+        - fp16: Whether to run GPU inference in half precision
+        - hw_encode: Whether to try hardware H.264 encoding for the output
     """
     ap = argparse.ArgumentParser()
     ap.add_argument("-p", "--prototxt", required=False,
@@ -55,6 +60,12 @@ def parse_arguments() -> Dict[str, Any]:
         help="minimum probability to filter weak detections")
     ap.add_argument("-s", "--skip-frames", type=int, default=30,
         help="# of skip frames between detections")
+    ap.add_argument("-b", "--backend", choices=["cpu", "opencl", "cuda"],
+        default="cpu", help="DNN inference backend")
+    ap.add_argument("--fp16", action="store_true",
+        help="use half precision on the cuda/opencl backends")
+    ap.add_argument("--hw-encode", action="store_true",
+        help="encode the output with NVENC/VAAPI via GStreamer if available")
     args = vars(ap.parse_args())
     return args
 
@@ -91,6 +102,34 @@ def log_data(
             wr.writerow(("Move In", "In Time", "Move Out", "Out Time"))
             wr.writerows(export_data)
 
+
+@lru_cache(maxsize=2)
+def load_model(prototxt: str, model: str, backend: str = "cpu",
+               fp16: bool = False) -> cv2.dnn.Net:
+    """Load the MobileNetSSD Caffe model, caching it across runs.
+
+    The scheduler calls people_counter() once a day, so the parsed network
+    is kept around instead of being re-read from disk on every run.
+
+    Args:
+        prototxt: Path to Caffe 'deploy' prototxt file
+        model: Path to Caffe pre-trained model
+        backend: "cpu", "opencl" or "cuda"; falls back towards the CPU
+            when the requested device is not available
+        fp16: Use the half-precision GPU target; ignored on the CPU
+
+    Returns:
+        Loaded OpenCV DNN network
+    """
+    net = cv2.dnn.readNetFromCaffe(prototxt, model)
+    used = thread.configure_backend(net, backend, fp16)
+    if used != backend:
+        logger.info("{} not available, using {}..".format(backend, used))
+    elif used != "cpu":
+        logger.info("Using {} DNN backend..".format(used))
+    return net
+
+
 def people_counter() -> None:
     """Main people counting application.
     
@@ -112,18 +151,28 @@ def people_counter() -> None:
         "sofa", "train", "tvmonitor"]
 
     # load our serialized model from disk
-    net = cv2.dnn.readNetFromCaffe(args["prototxt"], args["model"])
+    net = load_model(args["prototxt"], args["model"], args["backend"],
+        args["fp16"])
 
+    # pick the reader before opening the source, so only one is started
     # if a video path was not supplied, grab a reference to the ip camera
     if not args.get("input", False):
         logger.info("Starting the live stream..")
-        vs = VideoStream(config["url"]).start()
-        time.sleep(2.0)
+        if config["Thread"]:
+            vs = thread.ThreadingClass(config["url"])
+        else:
+            vs = VideoStream(config["url"]).start()
+            time.sleep(2.0)
 
     # otherwise, grab a reference to the video file
     else:
         logger.info("Starting the video..")
-        vs = cv2.VideoCapture(args["input"])
+        if config["Thread"]:
+            vs = thread.ThreadingClass(args["input"])
+        else:
+            # decode ahead in the background while the current frame is
+            # processed
+            vs = thread.FrameReader(thread.open_video(args["input"]))
 
     # initialize the video writer (we'll instantiate later if need be)
     writer = None
@@ -133,6 +182,11 @@ def people_counter() -> None:
     W = None
     H = None
 
+    # RGB copy of the frame for dlib; the buffer is reused across frames
+    # (the resized frame itself is not, as it may still be queued for the
+    # video writer)
+    rgb = None
+
     # instantiate our centroid tracker, then initialize a list to store
     # each of our dlib correlation trackers, followed by a dictionary to
     # map each unique object ID to a TrackableObject
@@ -155,13 +209,6 @@ def people_counter() -> None:
     # start the frames per second throughput estimator
     fps = FPS().start()
 
-    if config["Thread"]:
-        # Use the same source as the main video stream
-        if not args.get("input", False):
-            vs = thread.ThreadingClass(config["url"])
-        else:
-            vs = thread.ThreadingClass(args["input"])
-
     # loop over frames from the video stream
     while True:
         # grab the next frame and handle if we are reading from either
@@ -178,18 +225,24 @@ def people_counter() -> None:
         # less data we have, the faster we can process it), then convert
         # the frame from BGR to RGB for dlib
         frame = imutils.resize(frame, width = 500)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, rgb)
 
         # if the frame dimensions are empty, set them
         if W is None or H is None:
             (H, W) = frame.shape[:2]
+            # everything below that depends only on the frame size is
+            # computed once here instead of on every frame
+            mid_y = H // 2
+            box_scale = np.array([W, H, W, H])
+            border_pos = (10, H - 200)
+            status_pos = [(10, H - ((i * 20) + 20)) for i in range(3)]
+            total_pos = [(265, H - ((i * 20) + 60)) for i in range(1)]
 
         # if we are supposed to be writing a video to disk, initialize
         # the writer
         if args["output"] is not None and writer is None:
-            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-            writer = cv2.VideoWriter(args["output"], fourcc, 30,
-                (W, H), True)
+            writer = thread.FrameWriter(thread.open_writer(args["output"],
+                30, (W, H), args["hw_encode"]))
 
         # initialize the current status along with our list of bounding
         # box rectangles returned by either (1) our object detector or
@@ -206,42 +259,32 @@ def people_counter() -> None:
 
             # convert the frame to a blob and pass the blob through the
             # network and obtain the detections
-            blob = cv2.dnn.blobFromImage(frame, 0.007843, (W, H), 127.5)
+            # MobileNetSSD is trained at 300x300 (the prototxt input_shape);
+            # boxes come back normalized, so no rescale change is needed
+            blob = cv2.dnn.blobFromImage(frame, 0.007843, (Detection.INPUT_SIZE, Detection.INPUT_SIZE), 127.5)
             net.setInput(blob)
             detections = net.forward()
 
-            # loop over the detections
-            for i in np.arange(0, detections.shape[2]):
-                # extract the confidence (i.e., probability) associated
-                # with the prediction
-                confidence = detections[0, 0, i, 2]
-
-                # filter out weak detections by requiring a minimum
-                # confidence
-                if confidence > args["confidence"]:
-                    # extract the index of the class label from the
-                    # detections list
-                    idx = int(detections[0, 0, i, 1])
-
-                    # if the class label is not a person, ignore it
-                    if CLASSES[idx] != "person":
-                        continue
-
-                    # compute the (x, y)-coordinates of the bounding box
-                    # for the object
-                    box = detections[0, 0, i, 3:7] * np.array([W, H, W, H])
-                    (startX, startY, endX, endY) = box.astype("int")
-
-                    # construct a dlib rectangle object from the bounding
-                    # box coordinates and then start the dlib correlation
-                    # tracker
-                    tracker = dlib.correlation_tracker()
-                    rect = dlib.rectangle(startX, startY, endX, endY)
-                    tracker.start_track(rgb, rect)
-
-                    # add the tracker to our list of trackers so we can
-                    # utilize it during skip frames
-                    trackers.append(tracker)
+            # filter the detections in one pass: keep only "person"
+            # predictions above the minimum confidence
+            d = detections[0, 0]
+            keep = (d[:, 2] > args["confidence"]) & \
+                (d[:, 1].astype(np.int32) == CLASSES.index("person"))
+
+            # compute the (x, y)-coordinates of the bounding boxes
+            boxes = (d[keep, 3:7] * box_scale).astype("int")
+
+            for (startX, startY, endX, endY) in boxes.tolist():
+                # construct a dlib rectangle object from the bounding
+                # box coordinates and then start the dlib correlation
+                # tracker
+                tracker = dlib.correlation_tracker()
+                rect = dlib.rectangle(startX, startY, endX, endY)
+                tracker.start_track(rgb, rect)
+
+                # add the tracker to our list of trackers so we can
+                # utilize it during skip frames
+                trackers.append(tracker)
 
         # otherwise, we should utilize our object *trackers* rather than
         # object *detectors* to obtain a higher frame processing throughput
@@ -268,14 +311,21 @@ def people_counter() -> None:
         # draw a horizontal line in the center of the frame -- once an
         # object crosses this line we will determine whether they were
         # moving 'up' or 'down'
-        cv2.line(frame, (0, H // 2), (W, H // 2), (0, 0, 0), 3)
-        cv2.putText(frame, "-Prediction border - Entrance-", (10, H - ((i * 20) + 200)),
+        cv2.line(frame, (0, mid_y), (W, mid_y), (0, 0, 0), 3)
+        cv2.putText(frame, "-Prediction border - Entrance-", border_pos,
             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
 
         # use the centroid tracker to associate the (1) old object
         # centroids with (2) the newly computed object centroids
         objects = ct.update(rects)
 
+        # forget trackable objects the centroid tracker has deregistered
+        # (IDs are never reused), so the dictionary does not keep growing
+        # on long-running streams
+        if len(trackableObjects) > len(objects):
+            for objectID in [i for i in trackableObjects if i not in objects]:
+                del trackableObjects[objectID]
+
         # loop over the tracked objects
         for (objectID, centroid) in objects.items():
             # check to see if a trackable object exists for the current
@@ -293,16 +343,15 @@ def people_counter() -> None:
                 # centroid and the mean of *previous* centroids will tell
                 # us in which direction the object is moving (negative for
                 # 'up' and positive for 'down')
-                y = [c[1] for c in to.centroids]
-                direction = centroid[1] - np.mean(y)
-                to.centroids.append(centroid)
+                direction = centroid[1] - to.mean_y()
+                to.add_centroid(centroid)
 
                 # check to see if the object has been counted or not
                 if not to.counted:
                     # if the direction is negative (indicating the object
                     # is moving up) AND the centroid is above the center
                     # line, count the object
-                    if direction < 0 and centroid[1] < H // 2:
+                    if direction < 0 and centroid[1] < mid_y:
                         totalUp += 1
                         date_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
                         move_out.append(totalUp)
@@ -312,7 +361,7 @@ def people_counter() -> None:
                     # if the direction is positive (indicating the object
                     # is moving down) AND the centroid is below the
                     # center line, count the object
-                    elif direction > 0 and centroid[1] > H // 2:
+                    elif direction > 0 and centroid[1] > mid_y:
                         totalDown += 1
                         date_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
                         move_in.append(totalDown)
@@ -354,13 +403,13 @@ def people_counter() -> None:
         ]
 
         # display the output
-        for (i, (k, v)) in enumerate(info_status):
+        for ((k, v), pos) in zip(info_status, status_pos):
             text = "{}: {}".format(k, v)
-            cv2.putText(frame, text, (10, H - ((i * 20) + 20)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+            cv2.putText(frame, text, pos, cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
 
-        for (i, (k, v)) in enumerate(info_total):
+        for ((k, v), pos) in zip(info_total, total_pos):
             text = "{}: {}".format(k, v)
-            cv2.putText(frame, text, (265, H - ((i * 20) + 60)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            cv2.putText(frame, text, pos, cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
         # initiate a simple log to save the counting data
         if config["Log"]:
@@ -395,9 +444,13 @@ def people_counter() -> None:
     logger.info("Approx. FPS: {:.2f}".format(fps.fps()))
 
     # release the camera device/resource (issue 15)
-    if config["Thread"]:
+    if config["Thread"] or args.get("input", False):
         vs.release()
 
+    # flush the frames still queued for encoding
+    if writer is not None:
+        writer.release()
+
     # close any open windows
     cv2.destroyAllWindows()
 
@@ -1,11 +1,11 @@
-from typing import List, Tuple
+from typing import Tuple
 
 
 class TrackableObject:
 	"""
 	Represents a trackable object (person) in the video stream.
 	
-	Stores object ID, centroid history, and counting status.
+	Stores object ID, centroid statistics, and counting status.
 	"""
 	
 	def __init__(self, objectID: int, centroid: Tuple[int, int]) -> None:
@@ -15,11 +15,31 @@ class TrackableObject:
 			objectID: Unique identifier for this object
 			centroid: Initial centroid coordinates as (x, y)
 		"""
-		# store the object ID, then initialize a list of centroids
-		# using the current centroid
+		# store the object ID, then initialize the number of centroids
+		# seen so far along with a running sum of their y-coordinates
+		# (all the direction test needs from the history)
 		self.objectID: int = objectID
-		self.centroids: List[Tuple[int, int]] = [centroid]
+		self.count: int = 0
+		self.y_sum: int = 0
+		self.add_centroid(centroid)
 
 		# initialize a boolean used to indicate if the object has
 		# already been counted or not
-		self.counted: bool = False
\ No newline at end of file
+		self.counted: bool = False
+
+	def add_centroid(self, centroid: Tuple[int, int]) -> None:
+		"""Record a new centroid.
+		
+		Args:
+			centroid: Centroid coordinates as (x, y)
+		"""
+		self.count += 1
+		self.y_sum += int(centroid[1])
+
+	def mean_y(self) -> float:
+		"""Mean y-coordinate over every centroid recorded so far.
+		
+		Kept as a running sum, so the cost does not grow with the time
+		the object has been tracked.
+		"""
+		return self.y_sum / self.count
@@ -1,4 +1,5 @@
 import cv2
+import os
 import threading
 import queue
 from typing import Optional
@@ -68,3 +69,190 @@ class ThreadingClass:
     """
     self.running = False
     return self.cap.release() # release the hw resource
+
+
+def open_video(path: str) -> cv2.VideoCapture:
+  """Open a video file with multi-threaded FFmpeg decoding.
+  
+  The default capture decodes H.264 on a single thread, which is often
+  the bottleneck for HD footage. The thread count has to be passed as an
+  open parameter because the codec is set up when the file is opened.
+  If FFmpeg cannot open the file (or OpenCV was built without it), the
+  default backend selection is tried instead.
+  
+  Args:
+    path: Path to the video file
+  
+  Returns:
+    Video capture; check isOpened() as with cv2.VideoCapture
+  """
+  if hasattr(cv2, "CAP_PROP_N_THREADS"):
+    params = [cv2.CAP_PROP_N_THREADS, os.cpu_count() or 1]
+    cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG, params)
+  else:
+    cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG)
+  if not cap.isOpened():
+    cap.release()
+    cap = cv2.VideoCapture(path)
+  return cap
+
+
+def open_writer(path: str, fps: float, size: tuple,
+                hw_encode: bool = False) -> cv2.VideoWriter:
+  """Open a video writer, optionally with a hardware H.264 encoder.
+  
+  With hw_encode, NVENC and then VAAPI GStreamer pipelines are tried;
+  if OpenCV was built without GStreamer or neither encoder is present,
+  the software mp4v writer is used.
+  
+  Args:
+    path: Output video file path
+    fps: Output frame rate
+    size: Frame size as (width, height)
+    hw_encode: Whether to try the hardware encoders first
+  
+  Returns:
+    Opened video writer
+  """
+  if hw_encode:
+    for encoder in ("nvh264enc", "vaapih264enc"):
+      pipeline = ("appsrc ! videoconvert ! {} ! h264parse ! mp4mux ! "
+                  "filesink location={}".format(encoder, path))
+      writer = cv2.VideoWriter(pipeline, cv2.CAP_GSTREAMER, 0, fps, size, True)
+      if writer.isOpened():
+        return writer
+  fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+  return cv2.VideoWriter(path, fourcc, fps, size, True)
+
+
+def configure_backend(net: cv2.dnn.Net, backend: str = "cpu",
+                      fp16: bool = False) -> str:
+  """Select the DNN backend and target for a loaded network.
+  
+  CUDA falls back to OpenCL when no CUDA device is present, and OpenCL
+  falls back to the CPU when OpenCV has no OpenCL runtime.
+  
+  Args:
+    net: Network returned by cv2.dnn.readNet*
+    backend: "cpu", "opencl" or "cuda"
+    fp16: Use the half-precision GPU target; ignored on the CPU
+  
+  Returns:
+    The backend actually used: "cuda", "opencl" or "cpu"
+  """
+  if backend == "cuda":
+    if hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0:
+      net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+      net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA_FP16 if fp16
+                              else cv2.dnn.DNN_TARGET_CUDA)
+      return "cuda"
+    backend = "opencl"
+
+  net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+  if backend == "opencl" and cv2.ocl.haveOpenCL():
+    cv2.ocl.setUseOpenCL(True)
+    net.setPreferableTarget(cv2.dnn.DNN_TARGET_OPENCL_FP16 if fp16
+                            else cv2.dnn.DNN_TARGET_OPENCL)
+    return "opencl"
+  net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+  return "cpu"
+
+
+class FrameReader:
+  """Prefetch frames from a capture in a background thread.
+  
+  Unlike ThreadingClass no frame is ever dropped, so it is safe for video
+  files: decoding of the next frames overlaps with processing of the
+  current one, and the bounded queue stops the reader from running ahead.
+  """
+  
+  def __init__(self, cap: cv2.VideoCapture, maxsize: int = 8) -> None:
+    """Start prefetching frames.
+    
+    Args:
+      cap: Opened video capture to read from
+      maxsize: Maximum number of decoded frames held in memory
+    """
+    self.cap: cv2.VideoCapture = cap
+    self.q: queue.Queue = queue.Queue(maxsize=maxsize)
+    self.running: bool = True
+    self.t: threading.Thread = threading.Thread(target=self._reader)
+    self.t.daemon = True
+    self.t.start()
+
+  def _reader(self) -> None:
+    """Read frames until the stream ends, then queue a None sentinel."""
+    while self.running:
+      ret, frame = self.cap.read()
+      if not ret:
+        break
+      self.q.put(frame)
+    self.q.put(None)
+
+  def read(self) -> tuple:
+    """Read the next frame, mirroring cv2.VideoCapture.read().
+    
+    Returns:
+      (True, frame) for the next frame, or (False, None) at end of stream
+    """
+    frame = self.q.get()
+    if frame is None:
+      # keep the sentinel so later reads also see end of stream
+      self.q.put(None)
+      return False, None
+    return True, frame
+
+  def release(self) -> None:
+    """Stop the reader thread and release the capture."""
+    self.running = False
+    # drain the queue so a reader blocked on put() can exit
+    while self.t.is_alive():
+      try:
+        self.q.get_nowait()
+      except queue.Empty:
+        pass
+      self.t.join(timeout=0.1)
+    self.cap.release()
+
+
+class FrameWriter:
+  """Encode frames to a video writer in a background thread.
+  
+  write() only enqueues the frame, so encoding overlaps with processing of
+  the next frame. Frames must not be modified after being passed in.
+  """
+  
+  def __init__(self, writer: cv2.VideoWriter, maxsize: int = 8) -> None:
+    """Start the writer thread.
+    
+    Args:
+      writer: Opened video writer to encode frames with
+      maxsize: Maximum number of frames waiting to be encoded
+    """
+    self.writer: cv2.VideoWriter = writer
+    self.q: queue.Queue = queue.Queue(maxsize=maxsize)
+    self.t: threading.Thread = threading.Thread(target=self._writer)
+    self.t.daemon = True
+    self.t.start()
+
+  def _writer(self) -> None:
+    """Write queued frames until the None sentinel arrives."""
+    while True:
+      frame = self.q.get()
+      if frame is None:
+        break
+      self.writer.write(frame)
+
+  def write(self, frame: np.ndarray) -> None:
+    """Queue a frame for encoding, blocking if the encoder is behind.
+    
+    Args:
+      frame: Frame to write
+    """
+    self.q.put(frame)
+
+  def release(self) -> None:
+    """Flush pending frames and release the video writer."""
+    self.q.put(None)
+    self.t.join()
+    self.writer.release()